@@ -1,8 +1,15 @@
 import os
 import json
+import base64
+from html import escape
 from pathlib import Path
+from typing import Optional
 
+import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import pydeck as pdk
 import streamlit as st
 
@@ -13,28 +20,10 @@ st.set_page_config(
     layout="wide",
 )
 
-# ---------- Data loading (cache invalidates when files change) ----------
-@st.cache_data
-def _load_json_df(path: str, _mtime: float) -> pd.DataFrame:
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return pd.DataFrame(data)
-
-def load_json_df(path: str) -> pd.DataFrame:
-    mtime = os.path.getmtime(path)
-    return _load_json_df(path, mtime)
-
-def safe_load(path: str) -> pd.DataFrame:
-    try:
-        return load_json_df(path)
-    except json.JSONDecodeError as e:
-        st.error(f"{Path(path).name} has invalid JSON at line {e.lineno}, column {e.colno}: {e.msg}")
-        return pd.DataFrame()
-
-# ---------- Hero ----------
-hero_html = '''
+# ---------- Static HTML/CSS ----------
+HERO_TEMPLATE = '''
 <div style="text-align:center; padding: 28px 12px 8px;">
-    <img src="https://images.unsplash.com/photo-1560179707-f14e90ef3623"
+    <img src="{hero_src}"
          alt="Wine glass" width="96"
          style="border-radius:16px; box-shadow:0 10px 30px rgba(0,0,0,0.35); margin-bottom:14px;">
     <h1 style="margin:0; color:#f5f5fb; letter-spacing:0.3px;">Stay &amp; Sip Finger Lakes</h1>
@@ -43,123 +32,277 @@ hero_html = '''
     </p>
 </div>
 '''
-st.markdown(hero_html, unsafe_allow_html=True)
 
-# Quick link buttons under the hero
-c1, c2, c3, c4 = st.columns(4)
-c1.link_button("🍓 Stays", "#stays", use_container_width=True)
-c2.link_button("🍷 Wineries", "#wineries", use_container_width=True)
-c3.link_button("🗺️ Attractions", "#attractions", use_container_width=True)
-c4.link_button("💍 Venues", "#venues", use_container_width=True)
-st.markdown("<div style='margin-bottom:8px'></div>", unsafe_allow_html=True)
+PAGE_CSS = """
+    <style>
+      .element-container:has(.stImage) { margin-bottom: 0.25rem; }
+      .stButton>button { border-radius: 12px; padding: 0.5rem 0.75rem; }
+      .card-caption { color: rgba(230,230,240,.6); font-size: 14px; margin-bottom: .25rem; }
+      .stRadio [role="radiogroup"] { gap: .5rem; }
+      .stRadio label[data-baseweb="radio"] {
+        background: #111827; border-radius: 12px; padding: .6rem 1rem; font-weight: 600;
+        border: 1px solid rgba(255,255,255,.06);
+      }
+      .stRadio label[data-baseweb="radio"]:has(input:checked) {
+        background: #1f2937; border-color: rgba(155,135,245,.6);
+      }
+    </style>
+"""
 
-# ---------- Sidebar controls ----------
-st.sidebar.header("Search")
-lake_opts = ["All", "Keuka", "Seneca", "Cayuga"]
-lake = st.sidebar.selectbox("Lake", lake_opts, index=0)
-budget = st.sidebar.slider("Max price per night (stays)", 100, 400, 300, step=10)
-st.sidebar.markdown("---")
-if st.sidebar.button("🔄 Reload Results"):
-    st.cache_data.clear()
-    st.rerun()
+FOOTER_TEMPLATE = '''
+<div style="display:flex; gap:16px; flex-wrap:wrap; align-items:center; justify-content:center; padding:10px 6px; color:#bfc3d6; font-size:14px;">
+  <span>&copy; {year} Stay &amp; Sip Finger Lakes</span>
+  <span>&bull;</span>
+  <a href="mailto:hello@stayandsipflx.com" style="color:#cfd2e0; text-decoration:none;">Contact</a>
+  <span>&bull;</span>
+  <a href="https://maps.google.com/?q=Keuka+Lake+NY" target="_blank" style="color:#cfd2e0; text-decoration:none;">Map: Keuka Lake</a>
+  <span>&bull;</span>
+  <a href="https://www.instagram.com/" target="_blank" style="color:#cfd2e0; text-decoration:none;">Instagram</a>
+  <span>&bull;</span>
+  <a href="#" style="color:#cfd2e0; text-decoration:none;">Privacy</a>
+</div>
+<div style="text-align:center; color:#9aa0b8; font-size:12px; padding-bottom:12px;">
+  Affiliate disclosure: We may earn a commission when you book via links on this site. Thanks for supporting local guides.
+</div>
+'''
 
-# ---------- Load datasets ----------
-stays_df     = safe_load("data/stays.json")
-wineries_df  = safe_load("data/wineries.json")
-attr_df      = safe_load("data/attractions.json")
-venues_df    = safe_load("data/wedding_venues.json")
-itin_df      = safe_load("data/itineraries.json")
+# ---------- Data loading (cache invalidates when files change) ----------
+# cache_resource hands back the same frame without pickling a copy per call;
+# callers treat it as read-only. (path, mtime) is the whole key.
+@st.cache_resource(max_entries=16)
+def _load_json_df(path: str, mtime: float) -> pd.DataFrame:
+    with open(path, "rb") as f:
+        data = orjson.loads(f.read())
+    df = pd.DataFrame(data)
+    for col in ("lake", "type", "category"):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    if "id" in df.columns:
+        df = df.set_index("id", drop=False)
+    return df
 
-# ---------- Helpers (MUST be above any usage) ----------
-def apply_lake(df: pd.DataFrame) -> pd.DataFrame:
+@st.cache_resource(max_entries=16)
+def _lake_positions(path: str, mtime: float) -> dict:
+    # Row positions per lake in the loaded frame, so apply_lake can take()
+    # instead of masking. Only valid for that exact frame.
+    df = _load_json_df(path, mtime)
+    if "lake" not in df.columns:
+        return {}
+    codes = df["lake"].cat.codes.to_numpy()
+    return {lk: np.flatnonzero(codes == i) for i, lk in enumerate(df["lake"].cat.categories)}
+
+def load_json_df(path: str) -> pd.DataFrame:
+    mtime = os.path.getmtime(path)
+    return _load_json_df(path, mtime)
+
+def safe_load(path: str) -> pd.DataFrame:
+    try:
+        return load_json_df(path)
+    except json.JSONDecodeError as e:  # orjson.JSONDecodeError subclasses this
+        st.error(f"{Path(path).name} has invalid JSON at line {e.lineno}, column {e.colno}: {e.msg}")
+        return pd.DataFrame()
+
+# ---------- Helpers ----------
+def apply_lake(df: pd.DataFrame, lake: str, positions: Optional[dict] = None) -> pd.DataFrame:
+    # positions must come from _lake_positions for this exact frame
     if df is None or df.empty:
         return pd.DataFrame()
-    if lake != "All" and "lake" in df.columns:
+    if lake == "All" or "lake" not in df.columns:
+        return df
+    if positions is None:
         return df[df["lake"] == lake]
-    return df
+    return df.take(positions.get(lake, np.empty(0, dtype=np.intp)))
+
+@st.cache_data
+def _lake_view(name: str, lake: str, mtime: float) -> pd.DataFrame:
+    path = f"data/{name}.json"
+    try:
+        df = _load_json_df(path, mtime)
+    except json.JSONDecodeError:
+        return pd.DataFrame()  # already reported by safe_load
+    return apply_lake(df, lake, _lake_positions(path, mtime))
+
+@st.cache_data
+def _filter_options(name: str, col: str, lake: str, mtime: float) -> list:
+    df = _lake_view(name, lake, mtime)
+    if df.empty or col not in df.columns:
+        return ["All"]
+    return ["All"] + df[col].cat.remove_unused_categories().cat.categories.tolist()
+
+def type_options(lake: str, mtime: float) -> list:
+    return _filter_options("stays", "type", lake, mtime)
+
+def category_options(lake: str, mtime: float) -> list:
+    return _filter_options("attractions", "category", lake, mtime)
+
+MAP_SOURCES = [
+    ("stays", "Stay"),
+    ("wineries", "Winery"),
+    ("attractions", "Attraction"),
+    ("wedding_venues", "Wedding Venue"),
+]
+
+MAP_SCHEMA = pa.schema([
+    ("name", pa.string()),
+    ("lat", pa.float64()),
+    ("lng", pa.float64()),
+    ("lake", pa.string()),
+])
+
+@st.cache_data
+def _map_table(name: str, mtime: float) -> pa.Table:
+    df = _lake_view(name, "All", mtime)
+    if df.empty or not {"lat", "lng"}.issubset(df.columns):
+        return MAP_SCHEMA.empty_table()
+    cols = df[MAP_SCHEMA.names].astype({"lake": object})
+    return pa.Table.from_pandas(cols, schema=MAP_SCHEMA, preserve_index=False)
+
+@st.cache_data
+def build_mdf(lake: str, *mtimes: float) -> pd.DataFrame:
+    # Filter and concatenate as Arrow tables; convert to pandas once at the end
+    tables = []
+    for (name, ctype), mtime in zip(MAP_SOURCES, mtimes):
+        t = _map_table(name, mtime)
+        if lake != "All":
+            t = t.filter(pc.equal(t["lake"], lake))
+        tables.append(t.append_column("ctype", pa.array([ctype] * t.num_rows, pa.string())))
+    combined = pa.concat_tables(tables).select(["name", "lat", "lng", "ctype", "lake"])
+    return combined.rename_columns(["name", "lat", "lon", "ctype", "lake"]).to_pandas()
+
+@st.cache_data
+def map_payload(lake: str, *mtimes: float) -> list:
+    # Plain records, so pydeck doesn't re-serialize a DataFrame on every rerun
+    return build_mdf(lake, *mtimes).to_dict(orient="records")
+
+def _text_col(df: pd.DataFrame, col: str, default: str = "") -> pd.Series:
+    if col not in df.columns:
+        return pd.Series(default, index=df.index)
+    return df[col].astype(str)
 
 def card_grid(df: pd.DataFrame, card_type: str):
     if df is None or df.empty:
         st.info("No results. Try broadening filters.")
         return
+
+    # Build the per-card meta lines column-wise, outside the render loop
+    metas = [""] * len(df)
+    prices = [0] * len(df)
+    if card_type == "stay":
+        metas = (
+            _text_col(df, "type") + " • " + _text_col(df, "beds", "?") + " beds • up to "
+            + _text_col(df, "guests", "?") + " guests"
+        ).tolist()
+        if "price_per_night" in df.columns:
+            prices = pd.to_numeric(df["price_per_night"], errors="coerce").fillna(0).astype(int).tolist()
+    elif card_type == "venue":
+        metas = (_text_col(df, "type") + " • up to " + _text_col(df, "capacity", "?") + " guests").tolist()
+
+    records = df.to_dict(orient="records")
     cols_per_row = 3
-    rows = [df.iloc[i:i+cols_per_row] for i in range(0, len(df), cols_per_row)]
-    for row in rows:
-        cols = st.columns(len(row))
-        for col, (_, item) in zip(cols, row.iterrows()):
+    for start in range(0, len(records), cols_per_row):
+        chunk = records[start:start + cols_per_row]
+        cols = st.columns(len(chunk))
+        for i, (col, item) in enumerate(zip(cols, chunk), start):
             with col:
                 img = item.get("image")
                 if isinstance(img, str) and img:
                     st.image(img, use_column_width=True)
 
+                # All of the card's text goes out as a single markdown element
                 title = item.get("name", card_type)
                 subtitle = item.get("address", item.get("lake", ""))
-                st.subheader(title)
+                body = [f"<h3>{escape(str(title))}</h3>"]
 
                 if card_type == "stay":
-                    meta = f"{item.get('type','')} • {item.get('beds','?')} beds • up to {item.get('guests','?')} guests"
-                    price_val = item.get("price_per_night", 0)
-                    try:
-                        price = int(price_val)
-                    except Exception:
-                        price = 0
-                    st.markdown(f"**${price}/night** • {meta}")
+                    body.append(f"<p><b>${prices[i]}/night</b> • {escape(metas[i])}</p>")
                     tags = ", ".join(item.get("tags", []))
                     if tags:
-                        st.caption(tags)
+                        body.append(f"<p class='card-caption'>{escape(tags)}</p>")
 
                 elif card_type == "winery":
                     bits = []
                     if item.get("tasting"): bits.append("Tastings")
                     if item.get("tour"): bits.append("Tours")
-                    st.markdown(", ".join(bits))
-                    st.caption(item.get("notes", ""))
+                    body.append(f"<p>{', '.join(bits)}</p>")
+                    body.append(f"<p class='card-caption'>{escape(str(item.get('notes', '')))}</p>")
 
                 elif card_type == "attraction":
-                    st.markdown(item.get("category", ""))
-                    st.caption(item.get("notes", ""))
+                    body.append(f"<p>{escape(str(item.get('category', '')))}</p>")
+                    body.append(f"<p class='card-caption'>{escape(str(item.get('notes', '')))}</p>")
 
                 elif card_type == "venue":
-                    st.markdown(f"{item.get('type','')} • up to {item.get('capacity','?')} guests")
-                    st.caption(item.get("notes",""))
+                    body.append(f"<p>{escape(metas[i])}</p>")
+                    body.append(f"<p class='card-caption'>{escape(str(item.get('notes', '')))}</p>")
 
                 if subtitle:
-                    st.caption(subtitle)
+                    body.append(f"<p class='card-caption'>{escape(str(subtitle))}</p>")
+                st.markdown("".join(body), unsafe_allow_html=True)
 
                 link = item.get("link", "")
                 if link:
                     st.link_button("View details / Book", link, use_container_width=True)
 
-# ---------- Modern tabs + styling ----------
-st.markdown(
-    """
-    <style>
-      .element-container:has(.stImage) { margin-bottom: 0.25rem; }
-      .stButton>button { border-radius: 12px; padding: 0.5rem 0.75rem; }
-      .stTabs [data-baseweb="tab-list"] { gap: .5rem; }
-      .stTabs [data-baseweb="tab"] {
-        background: #111827; border-radius: 12px; padding: .6rem 1rem; font-weight: 600;
-        border: 1px solid rgba(255,255,255,.06);
-      }
-      .stTabs [aria-selected="true"] {
-        background: #1f2937; border-color: rgba(155,135,245,.6);
-      }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+# ---------- Hero ----------
+@st.cache_resource
+def hero_data_uri() -> str:
+    # Inline the bundled hero image so first paint doesn't wait on a remote host
+    return "data:image/svg+xml;base64," + base64.b64encode(Path("static/hero.svg").read_bytes()).decode()
 
-stays_tab, wineries_tab, attractions_tab, venues_tab, map_tab, itineraries_tab = st.tabs(
-    ["🍓 Stays", "🍷 Wineries", "🗺️ Attractions", "💍 Wedding Venues", "🧭 Map", "🧳 Itineraries"]
-)
+@st.cache_resource
+def _hero_html() -> str:
+    return HERO_TEMPLATE.format(hero_src=hero_data_uri())
+
+st.markdown(_hero_html(), unsafe_allow_html=True)
+
+# Quick link buttons under the hero switch the active view
+VIEW_LABELS = ["🍓 Stays", "🍷 Wineries", "🗺️ Attractions", "💍 Wedding Venues", "🧭 Map", "🧳 Itineraries"]
+
+def _show_view(view: str):
+    st.session_state["active_view"] = view
+
+c1, c2, c3, c4 = st.columns(4)
+c1.button("🍓 Stays", on_click=_show_view, args=("🍓 Stays",), use_container_width=True)
+c2.button("🍷 Wineries", on_click=_show_view, args=("🍷 Wineries",), use_container_width=True)
+c3.button("🗺️ Attractions", on_click=_show_view, args=("🗺️ Attractions",), use_container_width=True)
+c4.button("💍 Venues", on_click=_show_view, args=("💍 Wedding Venues",), use_container_width=True)
+st.markdown("<div style='margin-bottom:8px'></div>", unsafe_allow_html=True)
+
+# ---------- Sidebar controls ----------
+st.sidebar.header("Search")
+lake_opts = ["All", "Keuka", "Seneca", "Cayuga"]
+lake = st.sidebar.selectbox("Lake", lake_opts, index=0)
+budget = st.sidebar.slider("Max price per night (stays)", 100, 400, 300, step=10)
+st.sidebar.markdown("---")
+if st.sidebar.button("🔄 Reload Results"):
+    st.cache_data.clear()
+    _load_json_df.clear()
+    _lake_positions.clear()
+    st.rerun()
+
+# ---------- Load datasets ----------
+stays_df     = safe_load("data/stays.json")
+wineries_df  = safe_load("data/wineries.json")
+attr_df      = safe_load("data/attractions.json")
+venues_df    = safe_load("data/wedding_venues.json")
+itin_df      = safe_load("data/itineraries.json")
+mtimes = {
+    name: os.path.getmtime(f"data/{name}.json")
+    for name in ("stays", "wineries", "attractions", "wedding_venues", "itineraries")
+}
+
+# ---------- View switcher + styling ----------
+st.markdown(PAGE_CSS, unsafe_allow_html=True)
+
+# Unlike st.tabs, only the selected view's body runs on each rerun
+view = st.radio("View", VIEW_LABELS, horizontal=True, key="active_view", label_visibility="collapsed")
 
 # --- Stays ---
-with stays_tab:
-    st.markdown("<a name='stays'></a>", unsafe_allow_html=True)
-    df = apply_lake(stays_df)
+@st.fragment
+def _render_stays():
+    df = _lake_view("stays", lake, mtimes["stays"])
     if not df.empty and "price_per_night" in df.columns:
         df = df[df["price_per_night"] <= budget]
-    type_opts = ["All"] + (sorted(df["type"].dropna().unique().tolist()) if "type" in df.columns and not df.empty else [])
+    type_opts = type_options(lake, mtimes["stays"])
     c1, c2 = st.columns([1,2])
     with c1:
         tsel = st.selectbox("Type", type_opts, index=0)
@@ -170,9 +313,9 @@ with stays_tab:
     card_grid(df, "stay")
 
 # --- Wineries ---
-with wineries_tab:
-    st.markdown("<a name='wineries'></a>", unsafe_allow_html=True)
-    df = apply_lake(wineries_df)
+@st.fragment
+def _render_wineries():
+    df = _lake_view("wineries", lake, mtimes["wineries"])
     c1, c2 = st.columns([1,2])
     with c1:
         only_tastings = st.checkbox("Show places with tastings", value=False)
@@ -183,10 +326,10 @@ with wineries_tab:
     card_grid(df, "winery")
 
 # --- Attractions ---
-with attractions_tab:
-    st.markdown("<a name='attractions'></a>", unsafe_allow_html=True)
-    df = apply_lake(attr_df)
-    cat_opts = ["All"] + (sorted(df["category"].dropna().unique().tolist()) if "category" in df.columns and not df.empty else [])
+@st.fragment
+def _render_attractions():
+    df = _lake_view("attractions", lake, mtimes["attractions"])
+    cat_opts = category_options(lake, mtimes["attractions"])
     c1, c2 = st.columns([1,2])
     with c1:
         csel = st.selectbox("Category", cat_opts, index=0)
@@ -197,9 +340,9 @@ with attractions_tab:
     card_grid(df, "attraction")
 
 # --- Wedding Venues ---
-with venues_tab:
-    st.markdown("<a name='venues'></a>", unsafe_allow_html=True)
-    df = apply_lake(venues_df)
+@st.fragment
+def _render_venues():
+    df = _lake_view("wedding_venues", lake, mtimes["wedding_venues"])
     c1, c2 = st.columns([1,2])
     with c1:
         min_cap = st.slider("Min capacity", 50, 300, 100, step=25)
@@ -210,21 +353,11 @@ with venues_tab:
     card_grid(df, "venue")
 
 # --- Map ---
-with map_tab:
+@st.fragment
+def _render_map():
     st.subheader("All Listings Map")
-    combined = []
-    for dataset, ctype in [
-        (stays_df, "Stay"),
-        (wineries_df, "Winery"),
-        (attr_df, "Attraction"),
-        (venues_df, "Wedding Venue"),
-    ]:
-        d = apply_lake(dataset).copy()
-        if not d.empty and {"lat", "lng"}.issubset(d.columns):
-            d["ctype"] = ctype
-            combined.append(d[["name", "lat", "lng", "ctype", "lake"]])
-    if combined:
-        mdf = pd.concat(combined, ignore_index=True)
+    payload = map_payload(lake, *(mtimes[name] for name, _ in MAP_SOURCES))
+    if payload:
         st.pydeck_chart(
             pdk.Deck(
                 map_style="mapbox://styles/mapbox/dark-v11",
@@ -232,7 +365,7 @@ with map_tab:
                 layers=[
                     pdk.Layer(
                         "ScatterplotLayer",
-                        data=mdf.rename(columns={"lng": "lon"}),
+                        data=payload,
                         get_position="[lon, lat]",
                         get_radius=800,
                         pickable=True,
@@ -245,9 +378,10 @@ with map_tab:
         st.info("No locations to show.")
 
 # --- Itineraries ---
-with itineraries_tab:
+@st.fragment
+def _render_itineraries():
     st.subheader("Trip Ideas")
-    df = apply_lake(itin_df)
+    df = _lake_view("itineraries", lake, mtimes["itineraries"])
     if df.empty:
         st.info("Add itineraries in data/itineraries.json")
     else:
@@ -256,28 +390,22 @@ with itineraries_tab:
                 st.write(row["summary"])
                 st.caption(f"Focus: {row['lake']} Lake")
                 st.write("**Stays**")
-                st.table(stays_df[stays_df["id"].isin(row["stays"])][["name", "address", "price_per_night"]])
+                st.table(stays_df.loc[stays_df.index.intersection(row["stays"]), ["name", "address", "price_per_night"]])
                 st.write("**Wineries**")
-                st.table(wineries_df[wineries_df["id"].isin(row["wineries"])][["name", "address"]])
+                st.table(wineries_df.loc[wineries_df.index.intersection(row["wineries"]), ["name", "address"]])
                 st.write("**Attractions**")
-                st.table(attr_df[attr_df["id"].isin(row.get("attractions", []))][["name", "address"]])
+                st.table(attr_df.loc[attr_df.index.intersection(row.get("attractions", [])), ["name", "address"]])
+
+views = dict(zip(VIEW_LABELS, [
+    _render_stays, _render_wineries, _render_attractions, _render_venues, _render_map, _render_itineraries,
+]))
+views[view]()
 
 # ---------- Footer ----------
 st.markdown("---")
-footer_html = '''
-<div style="display:flex; gap:16px; flex-wrap:wrap; align-items:center; justify-content:center; padding:10px 6px; color:#bfc3d6; font-size:14px;">
-  <span>&copy; {year} Stay &amp; Sip Finger Lakes</span>
-  <span>&bull;</span>
-  <a href="mailto:hello@stayandsipflx.com" style="color:#cfd2e0; text-decoration:none;">Contact</a>
-  <span>&bull;</span>
-  <a href="https://maps.google.com/?q=Keuka+Lake+NY" target="_blank" style="color:#cfd2e0; text-decoration:none;">Map: Keuka Lake</a>
-  <span>&bull;</span>
-  <a href="https://www.instagram.com/" target="_blank" style="color:#cfd2e0; text-decoration:none;">Instagram</a>
-  <span>&bull;</span>
-  <a href="#" style="color:#cfd2e0; text-decoration:none;">Privacy</a>
-</div>
-<div style="text-align:center; color:#9aa0b8; font-size:12px; padding-bottom:12px;">
-  Affiliate disclosure: We may earn a commission when you book via links on this site. Thanks for supporting local guides.
-</div>
-'''.format(year=pd.Timestamp.today().year)
-st.markdown(footer_html, unsafe_allow_html=True)
+
+@st.cache_resource
+def _footer_html() -> str:
+    return FOOTER_TEMPLATE.format(year=pd.Timestamp.today().year)
+
+st.markdown(_footer_html(), unsafe_allow_html=True)